@@ -1,107 +1,152 @@
-import requests
-import feedparser
-import pdfkit
+import atexit
+import ciso8601
+import httpx
+import logging
+import logging.handlers
 import os
+import queue
 import re
-import json
-import csv
+import sqlite3
+import orjson
+import shutil
+import threading
+import zipfile
+import mimetypes
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from types import SimpleNamespace
 import argparse
 from datetime import datetime
+from functools import lru_cache
 from dateutil import parser as date_parser
-from jinja2 import Template
-from urllib.parse import urljoin, urlparse, urlsplit
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from email.utils import parsedate_to_datetime
+from html import escape as html_escape, unescape as html_unescape
+from urllib.parse import urljoin, urlparse
 from concurrent.futures import ThreadPoolExecutor
 from ebooklib import epub
-from bs4 import BeautifulSoup
-
-# Initialize a requests session with retry logic for reliability
-def create_session_with_retries(retries=3, backoff_factor=0.3):
-    session = requests.Session()
-    retry = Retry(
-        total=retries,
-        read=retries,
-        connect=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=(500, 502, 504)
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
+from selectolax.lexbor import LexborHTMLParser
+from weasyprint import HTML, CSS
+
+# Initialize an HTTP client with connect retries for reliability.
+# HTTP/2 multiplexes the concurrent post/image fetches over one connection
+# per host instead of paying HTTP/1.1 head-of-line blocking and a TLS
+# handshake per new connection
+def create_session_with_retries(retries=3):
+    # Large pool so concurrent post/image workers don't serialize on the
+    # default connection limits
+    limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    transport = httpx.HTTPTransport(retries=retries, http2=True, limits=limits)
+    return httpx.Client(transport=transport, follow_redirects=True)
 
 # Initialize a session with retry logic
 session = create_session_with_retries()
 
+# Semua log lewat satu queue: worker threads hanya antre record, satu
+# listener thread yang menulis, jadi tidak ada open/append file per error
+# dan status tidak antre di lock stdout antar thread
+_log_queue = queue.SimpleQueue()
+_error_handler = logging.FileHandler('error_log.txt', encoding='utf-8', delay=True)
+_error_handler.setLevel(logging.ERROR)
+_console_handler = logging.StreamHandler()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _error_handler, _console_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logger = logging.getLogger('scraper')
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
 # Helper function to save metadata to JSON
-def save_metadata(metadata, output_dir, as_json=False):
-    if as_json:
-        metadata_file = os.path.join(output_dir, "metadata.json")
-        with open(metadata_file, "w", encoding="utf-8") as file:
-            json.dump(metadata, file, indent=4, ensure_ascii=False)
-        print(f"Saved metadata to {metadata_file}")
-    else:
-        metadata_file = os.path.join(output_dir, "metadata.csv")
-        csv_columns = ['title', 'url', 'published_date', 'has_post_body']
-        try:
-            with open(metadata_file, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
-                writer.writeheader()
-                for data in metadata:
-                    writer.writerow(data)
-            print(f"Saved metadata to {metadata_file}")
-        except OSError as e:
-            log_error(f"Error saving metadata as CSV: {e}")
+def save_metadata(metadata, output_dir):
+    metadata_file = os.path.join(output_dir, "metadata.json")
+    with open(metadata_file, "wb") as file:
+        file.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+    logger.info(f"Saved metadata to {metadata_file}")
+
+# Append metadata entries to a JSONL file; debug mode flushes only the new
+# entries per page so total bytes written stay O(N) instead of O(N^2)
+def append_metadata_jsonl(entries, output_dir):
+    metadata_file = os.path.join(output_dir, "metadata.jsonl")
+    with open(metadata_file, "ab") as file:
+        for entry in entries:
+            file.write(orjson.dumps(entry) + b"\n")
+
+# Translation table built once: dropping characters via str.translate is a
+# C-level table lookup per char, much cheaper than running a regex per call
+_FILENAME_DROP = str.maketrans("", "", '\\/*?:"<>|')
 
 # Sanitize filename for file paths
 def sanitize_filename(filename):
-    return re.sub(r'[\\/*?:"<>|]', "", filename)
+    return filename.translate(_FILENAME_DROP)
 
-# Sanitize URLs for filename use
+# Sanitize URLs for filename use; plain string splits instead of urlsplit,
+# which would build a SplitResult tuple per image in the hot loop
 def sanitize_url(url):
-    url_path = urlsplit(url).path
-    return sanitize_filename(os.path.basename(url_path))
+    url_path = url.split('?', 1)[0].split('#', 1)[0]
+    return sanitize_filename(url_path.rsplit('/', 1)[-1])
+
+# Resolve an image URL against the feed URL. Most blogs emit absolute
+# https:// src attributes, so skip urljoin (two urlparse calls) for those
+def resolve_url(base_url, url):
+    if url.startswith(('http://', 'https://')):
+        return url
+    if url.startswith('//'):
+        return 'https:' + url
+    return urljoin(base_url, url)
 
 # Cek apakah situs adalah Blogspot (termasuk custom domain)
-def is_blogspot_site(url):
+# Di-cache per netloc: satu blog = satu probe, bukan satu probe per post
+@lru_cache(maxsize=256)
+def is_blogspot_site(netloc):
     try:
         # Attempt to access a known Blogspot feed URL pattern
-        blogspot_feed_url = url.rstrip('/') + "/feeds/posts/default?alt=rss"
+        blogspot_feed_url = f"https://{netloc}/feeds/posts/default?alt=rss"
         response = session.head(blogspot_feed_url)
         if response.status_code == 200:
             # Check if the response contains 'xml', a sign of Blogspot feed
             if "xml" in response.headers.get('Content-Type', '').lower():
-                print(f"Detected Blogspot site using custom domain: {blogspot_feed_url}")
+                logger.info(f"Detected Blogspot site using custom domain: {blogspot_feed_url}")
                 return blogspot_feed_url
-    except requests.RequestException:
+    except httpx.HTTPError:
         return None  # Tidak bisa mendeteksi sebagai Blogspot
     return None
 
+# Sidik jari CMS dicocokkan dalam satu lewatan regex (case-insensitive),
+# bukan beberapa substring scan atas seluruh halaman yang di-lower() dulu.
+# Tambah deteksi CMS lain (mis. Joomla, Drupal) lewat tabel ini.
+_CMS_FINGERPRINT_RE = re.compile(rb'blogger\.com|wp-content|wordpress|joomla|drupal', re.IGNORECASE)
+_CMS_BY_FINGERPRINT = {
+    b'blogger.com': 'blogspot',
+    b'wp-content': 'wordpress',
+    b'wordpress': 'wordpress',
+    b'joomla': 'joomla',
+    b'drupal': 'drupal',
+}
+
 # Fungsi baru untuk mendeteksi CMS berdasarkan beberapa karakteristik umum
+# Di-cache supaya deteksi tidak mengulang GET untuk URL yang sama
+@lru_cache(maxsize=256)
 def detect_cms(url):
-    try:
-        response = session.get(url)
-        html = response.text.lower()
-
-        # Deteksi CMS Blogspot
-        if "blogger.com" in html or "blogspot" in url:
-            return "blogspot"
-
-        # Deteksi CMS WordPress
-        if "wp-content" in html or "wordpress" in html:
-            return "wordpress"
+    # Deteksi CMS Blogspot dari URL tanpa request sama sekali
+    if "blogspot" in url:
+        return "blogspot"
 
-        # Tambah deteksi CMS lain jika diperlukan
-        # Contoh CMS lainnya bisa termasuk Joomla, Drupal, dll.
-        if "joomla" in html:
-            return "joomla"
-        if "drupal" in html:
-            return "drupal"
-
-    except requests.RequestException as e:
+    try:
+        # Cukup baca 64KB pertama: fingerprint CMS ada di <head>, bukan body
+        head_bytes = b''
+        with session.stream("GET", url) as response:
+            for chunk in response.iter_bytes(chunk_size=65536):
+                head_bytes = chunk
+                break
+
+        match = _CMS_FINGERPRINT_RE.search(head_bytes)
+        if match:
+            return _CMS_BY_FINGERPRINT[match.group(0).lower()]
+
+    except httpx.HTTPError as e:
         log_error(f"Error detecting CMS: {e}")
-    
+
     return "unknown"  # Jika CMS tidak terdeteksi
 
 # Mencari feed standar untuk non-Blogspot (WordPress, Joomla, Drupal, dll.)
@@ -126,52 +171,143 @@ def find_rss_feed(url, cms_type):
         try:
             response = session.head(feed_url)
             if response.status_code == 200:
-                print(f"Found RSS feed at: {feed_url}")
+                logger.info(f"Found RSS feed at: {feed_url}")
                 return feed_url
-        except requests.RequestException:
+        except httpx.HTTPError:
             continue
     return None
 
+# Parse an entry date: try ciso8601's C parser first (Atom/ISO-8601), then
+# the stdlib RFC 2822 parser (RSS pubDate), and only fall back to dateutil's
+# slow guessing parser for malformed feeds
+def parse_entry_date(value):
+    try:
+        return ciso8601.parse_datetime(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        pass
+    return date_parser.parse(value)
+
+# Atom namespace prefix for ElementTree tag matching
+_ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+# Parse feed XML in streaming mode; we only need link/title/published per
+# entry, so iterparse avoids building feedparser's full dict-of-dicts
+def parse_feed_entries(content):
+    entries = []
+    for _, elem in ET.iterparse(BytesIO(content), events=("end",)):
+        if elem.tag == 'item':  # RSS 2.0
+            entries.append(SimpleNamespace(
+                link=(elem.findtext('link') or '').strip(),
+                title=(elem.findtext('title') or '').strip(),
+                published=elem.findtext('pubDate')
+            ))
+            elem.clear()
+        elif elem.tag == f'{_ATOM_NS}entry':  # Atom
+            link = ''
+            for link_elem in elem.findall(f'{_ATOM_NS}link'):
+                if link_elem.get('rel') in (None, 'alternate'):
+                    link = link_elem.get('href', '')
+                    break
+            entries.append(SimpleNamespace(
+                link=link,
+                title=(elem.findtext(f'{_ATOM_NS}title') or '').strip(),
+                published=elem.findtext(f'{_ATOM_NS}published') or elem.findtext(f'{_ATOM_NS}updated')
+            ))
+            elem.clear()
+    return entries
+
 # Fetch RSS feed and handle pagination for Blogspot feeds
 def fetch_rss_feed(url, start_index=None, max_results=500):
     if start_index:
         url = f"{url}&start-index={start_index}&max-results={max_results}"
-    print(f"Fetching RSS feed: {url}")
-    feed = feedparser.parse(url)
-    if feed.bozo:
-        log_error(f"Failed to retrieve RSS feed. Error: {feed.bozo_exception}")
+    logger.info(f"Fetching RSS feed: {url}")
+    try:
+        response = session.get(url)
+        if response.status_code != 200:
+            log_error(f"Failed to retrieve RSS feed. Status code: {response.status_code} for URL: {url}")
+            return None
+        return parse_feed_entries(response.content)
+    except (httpx.HTTPError, ET.ParseError) as e:
+        log_error(f"Failed to retrieve RSS feed. Error: {e}")
         return None
-    return feed
+
+# Cache ETag/Last-Modified per URL di SQLite supaya re-run di blog yang
+# tidak berubah dijawab 304 tanpa body oleh server
+_HTTP_CACHE_PATH = 'http_cache.sqlite'
+_http_cache_lock = threading.Lock()
+_http_cache = None
+
+def _get_http_cache():
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = sqlite3.connect(_HTTP_CACHE_PATH, check_same_thread=False)
+        _http_cache.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_type TEXT, body BLOB)")
+        _http_cache.commit()
+    return _http_cache
+
+def _http_cache_get(url):
+    with _http_cache_lock:
+        cache = _get_http_cache()
+        return cache.execute(
+            "SELECT etag, last_modified, content_type, body FROM pages WHERE url = ?",
+            (url,)).fetchone()
+
+def _http_cache_put(url, etag, last_modified, content_type, body):
+    with _http_cache_lock:
+        cache = _get_http_cache()
+        cache.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_type, body))
+        cache.commit()
 
 # Fetch post content
 def fetch_post_content(post_url):
-    print(f"Fetching post content from URL: {post_url}")
-    response = session.get(post_url)
+    logger.info(f"Fetching post content from URL: {post_url}")
+
+    # Kirim conditional request jika URL pernah diunduh sebelumnya
+    cached = _http_cache_get(post_url)
+    headers = {}
+    if cached:
+        if cached[0]:
+            headers['If-None-Match'] = cached[0]
+        if cached[1]:
+            headers['If-Modified-Since'] = cached[1]
+
+    response = session.get(post_url, headers=headers)
+
+    if response.status_code == 304 and cached:
+        logger.info(f"Post unchanged (304), using cached content for URL: {post_url}")
+        text = cached[3].decode('utf-8', errors='replace')
+        return LexborHTMLParser(text)
+
     if response.status_code != 200:
         log_error(f"Failed to retrieve post content. Status code: {response.status_code} for URL: {post_url}")
         return None
 
-    # Handle encoding correctly and parse the content using BeautifulSoup
-    response.encoding = response.apparent_encoding  # Ensure correct encoding is used
+    # httpx falls back to charset detection when no charset header is sent,
+    # so no explicit apparent_encoding handling is needed
     content_type = response.headers.get('Content-Type', '').lower()
 
-    if 'xml' in content_type:
-        print("Detected XML content, using XML parser.")
-        soup = BeautifulSoup(response.text, features="xml")
-    else:
-        print("Detected HTML content, using HTML parser.")
-        soup = BeautifulSoup(response.text, 'lxml')
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        # Hanya simpan URL yang bisa divalidasi ulang oleh server
+        _http_cache_put(post_url, etag, last_modified, content_type,
+                        response.text.encode('utf-8'))
 
-    return soup
+    # lexbor parses XHTML/XML-served posts just as well as plain HTML, and
+    # returning a single parser type means only one node API leaves here
+    return LexborHTMLParser(response.text)
 
-# Scrape and extract content from a specific div class
-def extract_content_by_div(post_content, div_class):
-    soup = post_content
-    div_content = soup.find('div', class_=div_class)
-    if not div_content:
-        print(f"No content found in <div class='{div_class}'>")
-        return ""
-    return div_content
+# Get the serialized HTML of a selectolax tree/node (plain strings pass through)
+def node_to_html(node):
+    return node.html if hasattr(node, 'html') else str(node)
 
 # Download images inside specific <div> elements
 def download_images(post_content, post_folder, rss_url, inside_post_body=False):
@@ -179,43 +315,120 @@ def download_images(post_content, post_folder, rss_url, inside_post_body=False):
 
     # Prioritaskan scraping berdasarkan div: post-body, entry-content, post-entry
     if inside_post_body:
-        post_body = soup.find('div', class_='post-body') or soup.find('div', class_='entry-content') or soup.find('div', class_='post-entry')
+        post_body = soup.css_first("div.post-body, div.entry-content, div.post-entry")
 
         if post_body:
-            images = post_body.find_all('img')
+            images = post_body.css('img')
         else:
             images = []
     else:
-        images = soup.find_all('img')
+        images = soup.css('img')
 
     if not images:
-        print(f"No images found in the post.")
+        logger.info(f"No images found in the post.")
         return
     
-    print(f"Downloading {len(images)} images to {post_folder}")
-    for i, img in enumerate(images, start=1):
-        img_url = img.get('src')
-        if img_url:
-            img_url = urljoin(rss_url, img_url)
-            try:
-                img_data = session.get(img_url).content
-                ext = os.path.splitext(img_url)[1]
-                if ext.lower() not in ['.jpg', '.jpeg', '.png', '.gif']:  # Filter out non-image files
-                    continue
-                img_filename = sanitize_url(img_url)
-                img_filepath = os.path.join(post_folder, img_filename)
-                with open(img_filepath, 'wb') as img_file:
-                    img_file.write(img_data)
-                print(f"Downloaded {img_filepath}")
-            except requests.RequestException as e:
-                log_error(f"Error downloading image: {e} from URL: {img_url}")
+    # Kumpulkan unduhan setelah filter ekstensi; filter sebelum GET supaya
+    # tracking pixel/SVG tidak pernah diunduh. Keyed by path tujuan: src
+    # duplikat atau dua URL yang tersanitasi ke nama file sama (mis.
+    # s320/foo.jpg vs s1600/foo.jpg) tidak boleh balapan menulis file yang
+    # sama dari dua worker sekaligus
+    downloads = {}
+    for img in images:
+        img_url = img.attributes.get('src')
+        if not img_url:
+            continue
+        img_url = resolve_url(rss_url, img_url)
+        ext = os.path.splitext(img_url.split('?', 1)[0].split('#', 1)[0])[1].lower()
+        if ext and ext not in _IMAGE_EXTS:  # Filter out non-image files
+            continue
+        if not ext and not is_image_url(img_url):
+            # URL CDN tanpa ekstensi: cek Content-Type dulu lewat HEAD
+            continue
+        img_filepath = os.path.join(post_folder, sanitize_url(img_url))
+        downloads.setdefault(img_filepath, img_url)
+
+    if not downloads:
+        logger.info(f"No images found in the post.")
+        return
+
+    logger.info(f"Downloading {len(downloads)} images to {post_folder}")
+    # Download in parallel and stream to disk so total time is close to the
+    # slowest image instead of the sum, without buffering full bodies in RAM
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = []
+        for img_filepath, img_url in downloads.items():
+            futures.append(executor.submit(download_single_image, img_url, img_filepath))
+
+        # Propagasikan exception tak terduga (mis. OSError) dari worker;
+        # tanpa .result() kegagalan di pool hilang begitu saja
+        for future in futures:
+            future.result()
+
+# Ekstensi gambar yang boleh diunduh
+_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Cek lewat HEAD apakah sebuah URL tanpa ekstensi menunjuk ke gambar;
+# di-cache karena URL CDN yang sama sering muncul di banyak post
+@lru_cache(maxsize=1024)
+def is_image_url(img_url):
+    try:
+        response = session.head(img_url, timeout=10)
+        return response.headers.get('Content-Type', '').lower().startswith('image/')
+    except httpx.HTTPError:
+        return False
+
+# Cache URL gambar -> path lokal yang sudah diunduh; logo/avatar situs muncul
+# di banyak post dan tidak perlu diunduh ulang. Diakses dari worker threads.
+_downloaded_images = {}
+_downloaded_images_lock = threading.Lock()
+
+# Lindungi list metadata yang diisi dari banyak worker threads
+_metadata_lock = threading.Lock()
+
+# Stream a single image to disk in 64KB chunks, skipping URLs already fetched
+def download_single_image(img_url, img_filepath):
+    if os.path.exists(img_filepath):
+        return
+
+    with _downloaded_images_lock:
+        cached_path = _downloaded_images.get(img_url)
+    if cached_path and os.path.exists(cached_path):
+        # Sudah pernah diunduh untuk post lain; salin dari file lokal
+        shutil.copy(cached_path, img_filepath)
+        logger.info(f"Copied {img_filepath} from cache")
+        return
+
+    # Tulis ke nama sementara dulu; kalau transfer putus di tengah, file
+    # parsial tidak boleh terlihat sebagai hasil unduhan yang sah
+    tmp_filepath = img_filepath + '.part'
+    try:
+        # Accept-Encoding: identity agar server tidak mengompres ulang bytes
+        # gambar yang sudah terkompresi
+        with session.stream("GET", img_url, timeout=10, headers={'Accept-Encoding': 'identity'}) as response:
+            with open(tmp_filepath, 'wb') as img_file:
+                for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                    img_file.write(chunk)
+        os.replace(tmp_filepath, img_filepath)
+    except httpx.HTTPError as e:
+        log_error(f"Error downloading image: {e} from URL: {img_url}")
+        return
+    finally:
+        # Bersihkan sisa transfer yang gagal (apapun exception-nya)
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+
+    # Catat ke cache hanya setelah file utuh ada di tempatnya
+    with _downloaded_images_lock:
+        _downloaded_images[img_url] = img_filepath
+    logger.info(f"Downloaded {img_filepath}")
 
 # Save content as Markdown
 def save_as_markdown(post_content, output_path):
     try:
         with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(str(post_content))
-        print(f"Saved: {output_path}")
+            file.write(node_to_html(post_content))
+        logger.info(f"Saved: {output_path}")
     except OSError as e:
         log_error(f"Error saving post as markdown: {e}")
 
@@ -223,30 +436,14 @@ def save_as_markdown(post_content, output_path):
 def save_as_txt(post_content, output_path):
     try:
         with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(str(post_content))
-        print(f"Saved: {output_path}")
+            file.write(node_to_html(post_content))
+        logger.info(f"Saved: {output_path}")
     except OSError as e:
         log_error(f"Error saving post as txt: {e}")
 
-# Convert post content to PDF with custom CSS for better readability
-def convert_to_pdf(post_content, post_title, output_path, images_folder=None):
-    print(f"Converting content to PDF: {output_path}")
-    
-    # Lokasi wkhtmltopdf untuk Windows atau OS lain, sesuaikan dengan sistem yang digunakan
-    path_to_wkhtmltopdf = 'C:/Program Files/wkhtmltopdf/bin/wkhtmltopdf.exe'  # Modify as needed for your system
-    config = pdfkit.configuration(wkhtmltopdf=path_to_wkhtmltopdf)
-
-    # Jika ada gambar, ganti <img> tag dengan referensi gambar lokal
-    if images_folder:
-        images = post_content.find_all('img')
-        for img in images:
-            img_url = img.get('src')
-            if img_url:
-                img_filename = sanitize_url(img_url)
-                img['src'] = os.path.join(images_folder, img_filename)  # Ganti src menjadi path lokal
-
-    # Custom CSS to improve readability on smartphones
-    css_style = """
+# Custom CSS to improve readability on smartphones; built once at module
+# scope so the stylesheet is not re-parsed for every post
+_PDF_CSS = """
     /* General Text Styling for Readable PDF */
     body {
         font-family: Arial, sans-serif;
@@ -313,47 +510,56 @@ def convert_to_pdf(post_content, post_title, output_path, images_folder=None):
     }
     """
 
-    # Generate HTML for PDF with explicit UTF-8 encoding and embedded CSS
-    template = Template("""
+# Parsed stylesheet, shared across all renders
+_PDF_STYLESHEET = CSS(string=_PDF_CSS)
+
+# Kerangka HTML untuk PDF; konten sudah berupa HTML jadi cukup str.format,
+# tidak perlu kompilasi template Jinja per post
+_PDF_HTML_TEMPLATE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta http-equiv="X-UA-Compatible" content="IE=edge">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{{ title }}</title>
-        <style>{{ css }}</style>
+        <title>{title}</title>
     </head>
     <body>
-        <h1>{{ title }}</h1>
-        <div>{{ content|safe }}</div>
+        <h1>{title}</h1>
+        <div>{content}</div>
     </body>
     </html>
-    """)
-    
-    html_content = template.render(title=post_title, content=str(post_content), css=css_style)
+    """
 
-    temp_html_path = output_path.replace('.pdf', '.html')
-    
-    # Menyimpan HTML ke file sementara dengan encoding utf-8
-    with open(temp_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+# Ganti semua src <img> dalam satu lewatan regex atas HTML yang sudah
+# diserialisasi, bukan N mutasi atribut di pohon parse. \s sebelum src
+# wajib supaya data-src dkk. (lazy-load) tidak ikut tertangkap
+_IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\ssrc=["\'])([^"\']+)(["\'])', re.IGNORECASE)
+
+def rewrite_img_srcs(html_content, src_for):
+    return _IMG_SRC_RE.sub(lambda m: m.group(1) + src_for(m.group(2)) + m.group(3), html_content)
+
+# Convert post content to PDF with custom CSS for better readability.
+# WeasyPrint renders in-process and is thread-safe, so workers convert
+# their own posts in parallel with no subprocess startup or temp HTML file
+def convert_to_pdf(post_content, post_title, output_path, images_folder=None):
+    logger.info(f"Converting content to PDF: {output_path}")
+
+    # Jika ada gambar, ganti <img> src dengan nama file lokal; base_url di
+    # bawah membuat WeasyPrint mencarinya di folder gambar
+    content_html = node_to_html(post_content)
+    if images_folder:
+        content_html = rewrite_img_srcs(content_html, sanitize_url)
+
+    html_content = _PDF_HTML_TEMPLATE.format(
+        title=html_escape(post_title), content=content_html)
 
     try:
-        # Set wkhtmltopdf options to enforce UTF-8 rendering
-        options = {
-            'encoding': "UTF-8",  # Explicitly tell wkhtmltopdf to treat input as UTF-8
-        }
-        
-        # Biarkan wkhtmltopdf menentukan encoding dan mengonversi HTML ke PDF
-        pdfkit.from_file(temp_html_path, output_path, configuration=config, options=options)
+        HTML(string=html_content, base_url=images_folder).write_pdf(
+            output_path, stylesheets=[_PDF_STYLESHEET])
     except OSError as e:
         log_error(f"Error converting post to PDF: {e} for file: {output_path}")
 
-    # Menghapus file sementara HTML setelah proses selesai
-    if os.path.exists(temp_html_path):
-        os.remove(temp_html_path)
-
 # Save post as EPUB
 def save_as_epub(post_content, post_title, output_path, images_folder=None):
     book = epub.EpubBook()
@@ -365,26 +571,42 @@ def save_as_epub(post_content, post_title, output_path, images_folder=None):
 
     # Add a chapter
     chapter = epub.EpubHtml(title=post_title, file_name='chap.xhtml', lang='en')
-    
-    # If there are images, replace <img> tag with local image links
+
+    # Serialize once; image links are rewritten on the HTML string instead of
+    # mutating tree attributes per <img>
+    html_content = node_to_html(post_content)
+
+    # If there are images, replace <img> links with local image paths
     if images_folder:
-        images = post_content.find_all('img')
+        src_map = {}
+        images = post_content.css('img')
         for i, img in enumerate(images, start=1):
-            img_url = img.get('src')
-            if img_url:
-                img_filename = sanitize_url(img_url)
-                local_img_path = os.path.join(images_folder, img_filename)
-                # Add image to EPUB book
-                img_path_in_epub = f"images/{img_filename}"
-                img['src'] = img_path_in_epub
-                
-                # Add image to EPUB manifest
-                with open(local_img_path, 'rb') as img_file:
-                    image_data = img_file.read()
-                img_item = epub.EpubItem(uid=f"img_{i}", file_name=img_path_in_epub, media_type='image/jpeg', content=image_data)
-                book.add_item(img_item)
-
-    chapter.content = f"<h1>{post_title}</h1><div>{str(post_content)}</div>"
+            img_url = img.attributes.get('src')
+            if not img_url:
+                continue
+            img_filename = sanitize_url(img_url)
+            local_img_path = os.path.join(images_folder, img_filename)
+            if not os.path.exists(local_img_path):
+                continue  # Gambar gagal/tidak diunduh; biarkan URL aslinya
+            img_path_in_epub = f"images/{img_filename}"
+            src_map[img_url] = img_path_in_epub
+
+            # Add image to EPUB manifest with its real media type; readers
+            # reject mislabeled PNGs served as image/jpeg
+            media_type = mimetypes.guess_type(img_filename)[0] or 'image/jpeg'
+            with open(local_img_path, 'rb') as img_file:
+                image_data = img_file.read()
+            img_item = epub.EpubItem(uid=f"img_{i}", file_name=img_path_in_epub, media_type=media_type, content=image_data)
+            book.add_item(img_item)
+
+        if src_map:
+            # Satu lewatan regex untuk semua src, bukan N str.replace.
+            # Nilai atribut di HTML hasil serialisasi ter-escape (& jadi
+            # &amp;), sedangkan kunci src_map tidak; unescape dulu
+            html_content = rewrite_img_srcs(
+                html_content, lambda src: src_map.get(html_unescape(src), src))
+
+    chapter.content = f"<h1>{post_title}</h1><div>{html_content}</div>"
     book.add_item(chapter)
 
     # Define Table of Contents
@@ -399,43 +621,69 @@ def save_as_epub(post_content, post_title, output_path, images_folder=None):
 
     # Save the epub file
     epub.write_epub(output_path, book)
-    print(f"Saved: {output_path}")
+    store_epub_images_uncompressed(output_path)
+    logger.info(f"Saved: {output_path}")
+
+# Ekstensi gambar yang sudah terkompresi; DEFLATE ulang hanya membuang CPU
+_STORED_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Rewrite an EPUB so image entries are stored uncompressed (ZIP_STORED);
+# ebooklib deflates every entry, which wastes CPU on already-compressed bytes
+def store_epub_images_uncompressed(epub_path):
+    tmp_path = epub_path + '.tmp'
+    with zipfile.ZipFile(epub_path) as src, zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info.filename)
+            # mimetype harus tetap STORED sesuai spesifikasi EPUB
+            if info.filename == 'mimetype' or info.filename.lower().endswith(_STORED_IMAGE_EXTS):
+                dst.writestr(info.filename, data, compress_type=zipfile.ZIP_STORED)
+            else:
+                dst.writestr(info.filename, data)
+    os.replace(tmp_path, epub_path)
 
 # Function to log errors
 def log_error(error_message):
-    with open("error_log.txt", "a") as log_file:
-        log_file.write(error_message + "\n")
+    logger.error(error_message)
 
-# Get website name from URL
+# Get website name from URL (cached; called once per post in the hot loop)
+@lru_cache(maxsize=256)
 def get_website_name(url):
     return urlparse(url).netloc.replace('www.', '')
 
 # Function to fetch labels/tags from the RSS feed or from the website's HTML
 def fetch_labels_or_tags(rss_url):
-    print("Fetching available labels/tags from the website...")
+    logger.info("Fetching available labels/tags from the website...")
     response = session.get(rss_url)
-    soup = BeautifulSoup(response.text, 'lxml')
 
-    # Try to find tags in <category> elements from the feed if available
+    # Try to find tags in <category> elements from the feed if available;
+    # streaming scan saja, seluruh feed tidak perlu jadi pohon bs4
     categories = set()
-    for category in soup.find_all('category'):
-        categories.add(category.text.strip())
+    try:
+        for _, elem in ET.iterparse(BytesIO(response.content), events=("end",)):
+            if elem.tag.endswith('category'):
+                # Atom menaruh label di atribut term, RSS di teks elemen
+                categories.add((elem.get('term') or elem.text or '').strip())
+            elem.clear()
+    except ET.ParseError:
+        pass  # Bukan XML; coba fallback HTML di bawah
+
+    categories.discard('')
 
     # If no categories found, try searching for tags in the page (assuming certain class names)
     if not categories:
-        # Check for a common tag element in Blogspot or WordPress sites (e.g., in a sidebar or footer)
-        possible_tag_classes = ['label', 'tag', 'category']
-        for tag_class in possible_tag_classes:
-            tag_elements = soup.find_all('a', class_=tag_class)
-            for tag in tag_elements:
-                categories.add(tag.text.strip())
+        # Check for a common tag element in Blogspot or WordPress sites
+        # (e.g., in a sidebar or footer); one CSS-engine pass over lexbor
+        tree = LexborHTMLParser(response.text)
+        for tag in tree.css('a.label, a.tag, a.category'):
+            categories.add(tag.text(strip=True))
+        categories.discard('')
 
     # Return list of unique tags, sorted alphabetically
-    return sorted(list(categories))
+    return sorted(categories)
 
 # Function to scrape based on the selected label/tag
 def fetch_posts_by_label(rss_url, label, output_dir, mode, download_images_separately=False, debug=False):
-    print(f"Scraping posts with label: {label}")
+    logger.info(f"Scraping posts with label: {label}")
 
     # Modify RSS feed URL to fetch posts based on the selected label (this works for Blogspot)
     if "blogspot.com" in rss_url:
@@ -452,37 +700,32 @@ def fetch_posts_by_label(rss_url, label, output_dir, mode, download_images_separ
             # For non-Blogspot, attempt to use search/label
             label_url = rss_url + f"/search/label/{label.replace(' ', '%20')}?alt=rss"
 
-    print(f"Fetching RSS feed: {label_url}")
+    logger.info(f"Fetching RSS feed: {label_url}")
 
     # Scrape and save posts for the selected label
     scrape_and_save_rss_posts(label_url, output_dir, mode, download_images_separately, debug)
 
 # Process each post and download the content
-def process_post(entry, post_counter, output_dir, mode, metadata, download_images_separately, rss_url):
+def process_post(entry, post_counter, website_folder, mode, metadata, download_images_separately, rss_url):
     post_url = entry.link
     post_content = fetch_post_content(post_url)
-    
+
     if post_content is None:
         return
 
     post_title = sanitize_filename(entry.title)
-    post_date = date_parser.parse(entry.published) if 'published' in entry else datetime.now()
+    post_date = parse_entry_date(entry.published) if entry.published else datetime.now()
 
     # Cek apakah ada <div class="post-body">, <div class="entry-content">, <div class="post-entry">
-    website_name = get_website_name(post_url)
-    is_blogspot = is_blogspot_site(post_url) is not None  # Check if the site is Blogspot
-
-    website_folder = os.path.join(output_dir, website_name)
-    if not os.path.exists(website_folder):
-        os.makedirs(website_folder)
+    is_blogspot = is_blogspot_site(urlparse(post_url).netloc) is not None  # Check if the site is Blogspot
 
+    # exist_ok membuat mkdir bebas race antar worker threads
     post_folder = os.path.join(website_folder, f"{post_counter} - {post_title}")
-    if not os.path.exists(post_folder):
-        os.makedirs(post_folder)
+    os.makedirs(post_folder, exist_ok=True)
 
     # Scrape based on div class only if the site is Blogspot and in specific modes (PDF, EPUB)
     if is_blogspot:
-        post_body_div = post_content.find('div', class_='post-body') or post_content.find('div', class_='entry-content') or post_content.find('div', class_='post-entry')
+        post_body_div = post_content.css_first("div.post-body, div.entry-content, div.post-entry")
         has_post_body = bool(post_body_div)
     else:
         # Fallback to scraping the entire content if not Blogspot or no specific div found
@@ -492,8 +735,7 @@ def process_post(entry, post_counter, output_dir, mode, metadata, download_image
     images_folder = None
     if download_images_separately:
         images_folder = os.path.join(post_folder, "images")
-        if not os.path.exists(images_folder):
-            os.makedirs(images_folder)
+        os.makedirs(images_folder, exist_ok=True)
 
         # If blogspot and div exists, download images only from that div
         if is_blogspot and has_post_body:
@@ -502,8 +744,8 @@ def process_post(entry, post_counter, output_dir, mode, metadata, download_image
             # Otherwise, download all images from the post
             download_images(post_content, images_folder, rss_url, inside_post_body=False)
 
-    # Extract content based on the div class (similar to image download)
-    div_content = extract_content_by_div(post_content, "post-body")
+    # Reuse the div already located above instead of walking the tree again
+    div_content = post_body_div if has_post_body else post_content
 
     if mode == "PDF":
         output_file = os.path.join(post_folder, f"{post_title}.pdf")
@@ -518,24 +760,25 @@ def process_post(entry, post_counter, output_dir, mode, metadata, download_image
         output_file = os.path.join(post_folder, f"{post_title}.epub")
         save_as_epub(div_content if has_post_body else post_content, post_title, output_file, images_folder)
 
-    # Simpan metadata
-    metadata.append({
-        'title': entry.title,
-        'url': post_url,
-        'published_date': post_date.isoformat(),
-        'has_post_body': has_post_body
-    })
+    # Simpan metadata; list dibagi antar worker threads jadi perlu lock
+    with _metadata_lock:
+        metadata.append({
+            'title': entry.title,
+            'url': post_url,
+            'published_date': post_date.isoformat(),
+            'has_post_body': has_post_body
+        })
 
 # Main function to determine whether the site is Blogspot or another CMS and scrape accordingly
 def determine_rss_feed_url(rss_url):
     # Cek apakah ini Blogspot (termasuk custom domain Blogspot)
-    blogspot_feed_url = is_blogspot_site(rss_url)
+    blogspot_feed_url = is_blogspot_site(urlparse(rss_url).netloc)
     if blogspot_feed_url:
         return blogspot_feed_url
 
     # Deteksi CMS lainnya (WordPress, Joomla, Drupal, dll.)
     cms_type = detect_cms(rss_url)
-    print(f"Detected CMS: {cms_type}")
+    logger.info(f"Detected CMS: {cms_type}")
 
     # Jika terdeteksi CMS WordPress atau lainnya, cari feed yang sesuai
     if cms_type != "blogspot":
@@ -548,40 +791,52 @@ def determine_rss_feed_url(rss_url):
 
 # Main function to scrape RSS and save posts
 def scrape_and_save_rss_posts(rss_url, output_dir, mode, download_images_separately=False, debug=False):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
 
     # Tentukan RSS feed URL yang sesuai (baik Blogspot atau CMS lainnya)
     rss_url = determine_rss_feed_url(rss_url)
 
+    # Semua post di satu feed berbagi host, jadi folder situs cukup dibuat
+    # sekali di sini dan tidak per post di dalam worker
+    website_folder = os.path.join(output_dir, get_website_name(rss_url))
+    os.makedirs(website_folder, exist_ok=True)
+
     post_counter = 1
     metadata = []
+    metadata_flushed = 0  # Jumlah entri yang sudah ditulis ke JSONL (debug)
     start_index = 1
     max_results = 500
 
-    while True:
-        feed = fetch_rss_feed(rss_url, start_index=start_index, max_results=max_results)
-        if feed is None or len(feed.entries) == 0:
-            print("No more posts to scrape.")
-            break
+    # Satu pool persisten untuk semua halaman; halaman feed berikutnya
+    # di-prefetch sementara post halaman saat ini masih diproses, jadi
+    # pagination tidak menunggu post yang paling lambat
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        feed_future = executor.submit(fetch_rss_feed, rss_url, start_index, max_results)
+
+        while True:
+            entries = feed_future.result()
+            if not entries:
+                logger.info("No more posts to scrape.")
+                break
 
-        entries = feed.entries
+            start_index += len(entries)
+
+            # Prefetch halaman berikutnya sebelum memproses halaman ini
+            feed_future = executor.submit(fetch_rss_feed, rss_url, start_index, max_results)
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
             futures = []
             for entry in entries:
-                futures.append(executor.submit(process_post, entry, post_counter, output_dir, mode, metadata, download_images_separately, rss_url))
+                futures.append(executor.submit(process_post, entry, post_counter, website_folder, mode, metadata, download_images_separately, rss_url))
                 post_counter += 1
 
             for future in futures:
                 future.result()
 
-        start_index += len(entries)
-
-        if debug:
-            save_metadata(metadata, output_dir)
+            if debug:
+                append_metadata_jsonl(metadata[metadata_flushed:], output_dir)
+                metadata_flushed = len(metadata)
 
-    save_metadata(metadata, output_dir, as_json=True)  # Save metadata to JSON as well
+    save_metadata(metadata, output_dir)
 
 # Main function to include the option to search by label or tag
 def main():